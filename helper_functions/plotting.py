@@ -26,17 +26,13 @@ def _grid_shape(n: int) -> tuple[int, int]:
 
 
 def _compute_fixed_ylim_if_needed(
-    group1_data: pd.DataFrame, group2_data: pd.DataFrame, indices: list[str], fixed_ylim: tuple[float, float] | None
+    g1_arr: np.ndarray, g2_arr: np.ndarray, fixed_ylim: tuple[float, float] | None
 ) -> tuple[float, float] | None:
     if fixed_ylim is not None:
         return fixed_ylim
-    vals = []
-    for idx in indices:
-        vals.append(group1_data[idx].dropna().values)
-        vals.append(group2_data[idx].dropna().values)
-    if not vals:
+    vals = np.concatenate((g1_arr.ravel(), g2_arr.ravel()))
+    if vals.size == 0:
         return (0.0, 1.0)
-    vals = np.concatenate(vals)
     vmin, vmax = np.nanmin(vals), np.nanmax(vals)
     if not np.isfinite(vmin) or not np.isfinite(vmax):
         return (0.0, 1.0)
@@ -53,6 +49,7 @@ def plot_boxplots_fixed_with_pvals(
     g1_label: str,
     g2_label: str,
     fixed_ylim: tuple[float, float] | None = None,
+    fig: plt.Figure | None = None,
 ):
     """
     Multi-panel boxplots of indices for two groups with:
@@ -60,14 +57,31 @@ def plot_boxplots_fixed_with_pvals(
       • bold p-value badge per panel,
       • ONLY the bottom-most OCCUPIED subplot in each column shows x-axis labels,
       • y-ticks shown only on the first column to reduce clutter.
+    Pass a figure returned by a previous call with the same number of indices as `fig`
+    to redraw into its (cleared) axes instead of building a new figure.
     """
     rows, cols = _grid_shape(len(indices))
-    fig, axes = plt.subplots(rows, cols, figsize=(6*cols, 4.5*rows))
-    if not isinstance(axes, np.ndarray):
-        axes = np.array([axes])
-    axes = axes.flatten()
+    if fig is not None and len(fig.axes) == rows * cols:
+        axes = np.array(fig.axes)
+        # Undo the previous tight_layout so this draw starts from a fresh figure's geometry
+        fig.subplots_adjust(**{k: plt.rcParams[f"figure.subplot.{k}"]
+                               for k in ("left", "right", "bottom", "top", "wspace", "hspace")})
+        for ax in axes:
+            ax.cla()
+            ax.set_position(ax.get_subplotspec().get_position(fig))
+    else:
+        if fig is not None:
+            plt.close(fig)
+        fig, axes = plt.subplots(rows, cols, figsize=(6*cols, 4.5*rows))
+        if not isinstance(axes, np.ndarray):
+            axes = np.array([axes])
+        axes = axes.flatten()
+
+    # Convert once; columns are indexed by position below
+    g1_arr = group1_data[indices].to_numpy(dtype=float)
+    g2_arr = group2_data[indices].to_numpy(dtype=float)
 
-    shared_ylim = _compute_fixed_ylim_if_needed(group1_data, group2_data, indices, fixed_ylim)
+    shared_ylim = _compute_fixed_ylim_if_needed(g1_arr, g2_arr, fixed_ylim)
 
     # Determine the bottom-most occupied row in each column
     bottom_row_by_col = {}
@@ -77,8 +91,8 @@ def plot_boxplots_fixed_with_pvals(
 
     for i, idx in enumerate(indices):
         ax = axes[i]
-        g1_vals = group1_data[idx].dropna()
-        g2_vals = group2_data[idx].dropna()
+        g1_vals = g1_arr[~np.isnan(g1_arr[:, i]), i]
+        g2_vals = g2_arr[~np.isnan(g2_arr[:, i]), i]
 
         ax.boxplot([g1_vals, g2_vals], labels=[g1_label, g2_label], widths=0.5, positions=[1, 2])
         if shared_ylim is not None:
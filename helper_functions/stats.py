@@ -5,21 +5,66 @@ import pandas as pd
 from scipy.stats import shapiro, ttest_ind, mannwhitneyu
 
 
-def cohen_d(x: np.ndarray, y: np.ndarray) -> float:
-    nx, ny = len(x), len(y)
+def cohen_d(x: np.ndarray, y: np.ndarray, axis: int = 0) -> float | np.ndarray:
+    """Cohen's d along `axis` (NaNs ignored); 2-D inputs give one value per column."""
+    nx = np.sum(~np.isnan(x), axis=axis)
+    ny = np.sum(~np.isnan(y), axis=axis)
     dof = nx + ny - 2
     pooled_std = np.sqrt(
-        ((nx - 1) * np.var(x, ddof=1) + (ny - 1) * np.var(y, ddof=1)) / dof
+        ((nx - 1) * np.nanvar(x, axis=axis, ddof=1) + (ny - 1) * np.nanvar(y, axis=axis, ddof=1)) / dof
     )
-    return (np.mean(x) - np.mean(y)) / pooled_std
+    return (np.nanmean(x, axis=axis) - np.nanmean(y, axis=axis)) / pooled_std
+
+
+# Above this many pairwise comparisons the (n, m) sign matrix gets large; switch to binary search
+_CLIFF_BROADCAST_MAX = 4_000_000
+
+
+def _cliffs_delta_searchsorted(x: np.ndarray, y: np.ndarray) -> float:
+    n, m = len(x), len(y)
+    # sum(sign(xi - y)) == #(y < xi) - #(y > xi), counted by binary search on sorted y
+    y_sorted = np.sort(np.ascontiguousarray(y))
+    gt = np.searchsorted(y_sorted, x, side='left')
+    lt = m - np.searchsorted(y_sorted, x, side='right')
+    return float((gt - lt).sum()) / (n * m)
 
 
 def cliffs_delta(x: np.ndarray, y: np.ndarray) -> float:
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
     n, m = len(x), len(y)
-    total = 0
-    for xi in x:
-        total += np.sum(np.sign(xi - y))
-    return total / (n * m)
+    if n * m < _CLIFF_BROADCAST_MAX:
+        return float(np.sign(x[:, None] - y[None, :]).sum()) / (n * m)
+    return _cliffs_delta_searchsorted(x, y)
+
+
+# SciPy's method='auto' may use the exact distribution only when a sample has at most this many values
+_MWU_EXACT_MAX_N = 8
+
+
+def _mannwhitneyu_columns(G1: np.ndarray, G2: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Two-sided Mann–Whitney U per column, with method='auto' decided per column.
+
+    A batched 2-D call picks exact vs asymptotic once for the whole array, and checks ties
+    across all columns. Columns where 'auto' is sure to be asymptotic (ties, or both samples
+    larger than the exact-size limit) are therefore batched with method='asymptotic'. The
+    remaining columns are tested one by one."""
+    k = G1.shape[1]
+    stat = np.full(k, np.nan)
+    pval = np.full(k, np.nan)
+    asymptotic = np.zeros(k, dtype=bool)
+    for i in range(k):
+        a, b = G1[:, i], G2[:, i]
+        a, b = a[~np.isnan(a)], b[~np.isnan(b)]
+        pooled = np.concatenate((a, b))
+        has_ties = np.unique(pooled).size < pooled.size
+        asymptotic[i] = has_ties or min(a.size, b.size) > _MWU_EXACT_MAX_N
+        if not asymptotic[i]:
+            stat[i], pval[i] = mannwhitneyu(a, b, alternative='two-sided')
+    if np.any(asymptotic):
+        res = mannwhitneyu(G1[:, asymptotic], G2[:, asymptotic], axis=0,
+                           alternative='two-sided', method='asymptotic', nan_policy='omit')
+        stat[asymptotic], pval[asymptotic] = res.statistic, res.pvalue
+    return stat, pval
 
 
 def calculate_effect_sizes(
@@ -38,26 +83,35 @@ def calculate_effect_sizes(
     results_list = []
     normality_flags = {}
 
-    # Shapiro–Wilk normality per group/index
-    for label, data in zip([g1_label, g2_label], [group1_data, group2_data]):
-        for idx in index_names:
-            arr = data[idx].dropna()
-            if len(arr) < 3:
-                normality_flags[(label, idx)] = 'Not Normal'
-            else:
-                _, pval = shapiro(arr)
-                normality_flags[(label, idx)] = 'Normal' if pval > 0.05 else 'Not Normal'
+    G1 = group1_data[index_names].to_numpy(dtype=float)
+    G2 = group2_data[index_names].to_numpy(dtype=float)
+
+    # Shapiro–Wilk normality per group/index (one vectorized call per group)
+    for label, arr in zip([g1_label, g2_label], [G1, G2]):
+        enough = np.sum(~np.isnan(arr), axis=0) >= 3
+        pvals = np.full(len(index_names), np.nan)
+        if np.any(enough):
+            pvals[enough] = shapiro(arr[:, enough], axis=0, nan_policy='omit').pvalue
+        for i, idx in enumerate(index_names):
+            normality_flags[(label, idx)] = 'Normal' if enough[i] and pvals[i] > 0.05 else 'Not Normal'
+
+    # Run both tests for all indices at once (one column per index), then pick per index
+    both_normal = np.array([
+        normality_flags[(g1_label, idx)] == 'Normal' and normality_flags[(g2_label, idx)] == 'Normal'
+        for idx in index_names
+    ], dtype=bool)
+    t_stat, t_p = ttest_ind(G1, G2, axis=0, nan_policy='omit')
+    mw_stat, mw_p = _mannwhitneyu_columns(G1, G2)
+    stats_all = np.where(both_normal, np.asarray(t_stat, dtype=float), np.asarray(mw_stat, dtype=float))
+    pvals_all = np.where(both_normal, np.asarray(t_p, dtype=float), np.asarray(mw_p, dtype=float))
+    cohen_all = np.atleast_1d(cohen_d(G1, G2, axis=0))
 
-    for idx in index_names:
-        arr1 = group1_data[idx].dropna()
-        arr2 = group2_data[idx].dropna()
-        norm1 = normality_flags[(g1_label, idx)]
-        norm2 = normality_flags[(g2_label, idx)]
+    for i, idx in enumerate(index_names):
+        stat, pval = stats_all[i], pvals_all[i]
 
-        if norm1 == 'Normal' and norm2 == 'Normal':
+        if both_normal[i]:
             test_name = "Student's t-test"
-            stat, pval = ttest_ind(arr1, arr2, nan_policy='omit')
-            eff = cohen_d(arr1.values, arr2.values)
+            eff = cohen_all[i]
             eff_label = 'Cohen'
             abs_eff = abs(eff)
             if abs_eff < 0.25:
@@ -70,8 +124,8 @@ def calculate_effect_sizes(
                 interp = 'Very Large'
         else:
             test_name = 'Mann-Whitney U test'
-            stat, pval = mannwhitneyu(arr1, arr2, alternative='two-sided')
-            eff = cliffs_delta(arr1.values, arr2.values)
+            col1, col2 = G1[:, i], G2[:, i]
+            eff = cliffs_delta(col1[~np.isnan(col1)], col2[~np.isnan(col2)])
             eff_label = 'Cliff'
             abs_eff = abs(eff)
             if abs_eff < 0.15:
@@ -41,11 +41,18 @@ from pathlib import Path
 import os
 import re
 import csv
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import scipy.io
+from scipy.signal import fftconvolve
 from scipy.stats import gaussian_kde
 from tqdm import tqdm  # progress bars
 
+try:  # optional: JIT-compiled HRA kernel
+    from numba import njit
+except ImportError:
+    njit = None
+
 from pathlib import Path
 
 # --- Project root and data layout --------------------------------------------
@@ -69,6 +76,10 @@ GRID_SIZE     = 1000                # for KDE AMI
 NUM_BINS_LIST = [25, 50, 100, 150, 200, 300, 500, 1000]  # for HB AMI
 LOWER_BOUND   = 300                 # ms (RR lower limit)
 UPPER_BOUND   = 2000                # ms (RR upper limit)
+KDE_METHOD    = "exact"             # KDE AMI density: 'exact' (gaussian_kde) or 'fft' (binned, faster, approximate; see _kde_density_fft)
+
+# Parallel processing ----------------------------------------------------------
+N_JOBS        = None                # worker processes per group (None = all cores, 1 = serial)
 
 if choice == 1:
     # Cohort abbreviations ensure descriptive output file naming
@@ -106,110 +117,235 @@ EXPORT_DIR = ROOT_DIR / "results" / "nonlinear_measures" / f"{g1}_vs_{g2}"
 # ║                      Nonlinear Measure Definitions                         ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
-def SD1(rr_intervals: np.ndarray) -> float:
-    diffs = np.diff(rr_intervals)
-    sdsd = np.sqrt(np.var(diffs, ddof=1))
-    return float(sdsd / np.sqrt(2.0))
-
-def SD2(rr_intervals: np.ndarray) -> float:
-    sdrr = np.std(rr_intervals, ddof=1)
+def _sd1_sd2(rr_intervals: np.ndarray) -> tuple[float, float]:
+    """SD1 and SD2 from a single pass over the successive differences."""
     sdsd = np.std(np.diff(rr_intervals), ddof=1)
-    return float(np.sqrt(2 * sdrr**2 - 0.5 * sdsd**2))
-
-def porta_index(M: np.ndarray) -> float:
-    rrn, rrn1 = M[:, 0], M[:, 1]
-    above = np.sum(rrn1 > rrn)
-    below = np.sum(rrn1 < rrn)
-    denom = above + below
-    if denom == 0:
-        return 0.0
-    p = above / denom
-    return float(2 * abs(p - 0.5))
-
-def guzik_index(M: np.ndarray) -> float:
-    rrn, rrn1 = M[:, 0], M[:, 1]
-    perp = np.abs(rrn - rrn1) / np.sqrt(2.0)
-    sq = perp**2
-    sa = np.sum(sq[rrn1 > rrn])
-    sb = np.sum(sq[rrn1 < rrn])
-    denom = sa + sb
-    if denom == 0:
-        return 0.0
-    g = sa / denom
-    return float(2 * abs(g - 0.5))
+    sdrr = np.std(rr_intervals, ddof=1)
+    return float(sdsd / np.sqrt(2.0)), float(np.sqrt(2 * sdrr**2 - 0.5 * sdsd**2))
 
-def asymmetric_spread_index(M: np.ndarray) -> float:
-    rrn, rrn1 = M[:, 0], M[:, 1]
-    slopes = np.abs(np.arctan2(rrn1, rrn) - np.pi / 4.0)
-    dist = np.sqrt(rrn**2 + rrn1**2)
-    arc = slopes * dist
-    valid = rrn1 != rrn
-    if not np.any(valid) or np.sum(rrn1 > rrn) == 0:
-        return 0.0
-    sd_above = np.std(arc[rrn1 > rrn], ddof=1)
-    sd_total = np.std(arc[valid], ddof=1)
-    if sd_total == 0:
-        return 0.0
-    return float(sd_above / (2.0 * sd_total))
+def SD1(rr_intervals: np.ndarray) -> float:
+    return _sd1_sd2(rr_intervals)[0]
 
-def scaled_frobenius_norm(rr_intervals: np.ndarray, num_bins: int) -> float:
-    prev, curr = rr_intervals[:-1], rr_intervals[1:]
-    xedges = np.linspace(LOWER_BOUND, UPPER_BOUND, num_bins + 1)
-    yedges = np.linspace(LOWER_BOUND, UPPER_BOUND, num_bins + 1)
-    counts, _, _ = np.histogram2d(prev, curr, bins=[xedges, yedges])
-    diff = counts - counts.T
-    max_abs = np.max(np.abs(diff))
-    if max_abs == 0:
-        return 0.0
-    scaled = diff / max_abs
-    theory = np.triu(np.ones((num_bins, num_bins)), 1) - np.tril(np.ones((num_bins, num_bins)), -1)
-    norm_theory = theory / np.max(np.abs(theory))
-    frob_max = np.linalg.norm(norm_theory, "fro")
-    frob = np.linalg.norm(scaled, "fro")
-    return float(frob / frob_max)
-
-def area_index(M: np.ndarray) -> float:
-    rrn, rrn1 = M[:, 0], M[:, 1]
+def SD2(rr_intervals: np.ndarray) -> float:
+    return _sd1_sd2(rr_intervals)[1]
+
+def _hra_all(rrn: np.ndarray, rrn1: np.ndarray) -> tuple[float, float, float, float, float]:
+    """Guzik, Porta, Asymmetric Spread, Slope and Area indices (numba kernel if available)."""
+    if _hra_all_nb is not None:
+        return _hra_all_nb(rrn, rrn1)
+    return _hra_all_np(rrn, rrn1)
+
+def _hra_all_np(rrn: np.ndarray, rrn1: np.ndarray) -> tuple[float, float, float, float, float]:
+    """NumPy version of `_hra_all` computing all indices from shared intermediates."""
+    diff = rrn1 - rrn
+    up = diff > 0
+    down = diff < 0
+    n_up = np.count_nonzero(up)
+    n_down = np.count_nonzero(down)
     angles = np.abs(np.arctan2(rrn1, rrn) - np.pi / 4.0)
     dist = np.sqrt(rrn**2 + rrn1**2)
+
+    # Guzik index (squared distance to the identity line is diff**2 / 2)
+    sq = 0.5 * diff * diff
+    sa = np.where(up, sq, 0.0).sum()
+    sb = np.where(down, sq, 0.0).sum()
+    denom = sa + sb
+    gi = 0.0 if denom == 0 else float(2 * abs(sa / denom - 0.5))
+
+    # Porta index
+    denom = n_up + n_down
+    pi = 0.0 if denom == 0 else float(2 * abs(n_up / denom - 0.5))
+
+    # Asymmetric spread index
+    asi = 0.0
+    if n_up > 0:
+        arc = angles * dist
+        sd_above = np.std(arc[up], ddof=1)
+        sd_total = np.std(arc[up | down], ddof=1)
+        if sd_total != 0:
+            asi = float(sd_above / (2.0 * sd_total))
+
+    # Slope index
+    s_total = np.sum(angles)
+    si = 0.0 if s_total == 0 else float(2 * abs(np.sum(angles[up]) / s_total - 0.5))
+
+    # Area index
     sector = 0.5 * dist**2 * angles
     total_area = np.sum(sector)
-    if total_area == 0:
-        return 0.0
-    area = np.sum(sector[rrn1 > rrn])
-    ai = area / total_area
-    return float(2 * abs(ai - 0.5))
-
-def slope_index(M: np.ndarray) -> float:
-    rrn, rrn1 = M[:, 0], M[:, 1]
-    slopes = np.abs(np.arctan2(rrn1, rrn) - np.pi / 4.0)
-    s_total = np.sum(slopes)
-    if s_total == 0:
+    ai = 0.0 if total_area == 0 else float(2 * abs(np.sum(sector[up]) / total_area - 0.5))
+
+    return gi, pi, asi, si, ai
+
+if njit is not None:
+    # no fastmath: its no-NaN assumption breaks the NaN ASI of single-sample spreads
+    @njit(cache=True, error_model="numpy")
+    def _hra_all_nb(rrn, rrn1):
+        """Single streaming pass over the pairs; ASI spreads use Welford updates."""
+        n_up = n_down = 0
+        sa = sb = 0.0
+        s_total = s_up = 0.0
+        a_total = a_up = 0.0
+        mean_up = m2_up = 0.0
+        mean_v = m2_v = 0.0
+        for i in range(rrn.size):
+            x, y = rrn[i], rrn1[i]
+            d = x - y
+            ang = abs(np.arctan2(y, x) - np.pi / 4.0)
+            dist2 = x * x + y * y
+            arc = ang * np.sqrt(dist2)
+            sector = 0.5 * dist2 * ang
+            s_total += ang
+            a_total += sector
+            if y > x:
+                n_up += 1
+                sa += 0.5 * d * d
+                s_up += ang
+                a_up += sector
+                delta = arc - mean_up
+                mean_up += delta / n_up
+                m2_up += delta * (arc - mean_up)
+            elif y < x:
+                n_down += 1
+                sb += 0.5 * d * d
+            else:
+                continue
+            n_v = n_up + n_down
+            delta = arc - mean_v
+            mean_v += delta / n_v
+            m2_v += delta * (arc - mean_v)
+
+        denom = sa + sb
+        gi = 0.0 if denom == 0 else 2 * abs(sa / denom - 0.5)
+        n_v = n_up + n_down
+        pi = 0.0 if n_v == 0 else 2 * abs(n_up / n_v - 0.5)
+        asi = 0.0
+        if n_up > 0:
+            # np.std(..., ddof=1) of a single value is NaN; mirror that explicitly
+            sd_total = np.nan if n_v < 2 else np.sqrt(m2_v / (n_v - 1))
+            if sd_total != 0:
+                sd_above = np.nan if n_up < 2 else np.sqrt(m2_up / (n_up - 1))
+                asi = sd_above / (2.0 * sd_total)
+        si = 0.0 if s_total == 0 else 2 * abs(s_up / s_total - 0.5)
+        ai = 0.0 if a_total == 0 else 2 * abs(a_up / a_total - 0.5)
+        return gi, pi, asi, si, ai
+else:
+    _hra_all_nb = None
+
+# Convenience wrappers for computing a single index. Each one runs the full `_hra_all`
+# and keeps one result; call `_hra_all` directly when more than one index is needed.
+def guzik_index(rrn: np.ndarray, rrn1: np.ndarray) -> float:
+    return _hra_all(rrn, rrn1)[0]
+
+def porta_index(rrn: np.ndarray, rrn1: np.ndarray) -> float:
+    return _hra_all(rrn, rrn1)[1]
+
+def asymmetric_spread_index(rrn: np.ndarray, rrn1: np.ndarray) -> float:
+    return _hra_all(rrn, rrn1)[2]
+
+def slope_index(rrn: np.ndarray, rrn1: np.ndarray) -> float:
+    return _hra_all(rrn, rrn1)[3]
+
+def area_index(rrn: np.ndarray, rrn1: np.ndarray) -> float:
+    return _hra_all(rrn, rrn1)[4]
+
+def _theory_frob_max(n: int) -> float:
+    """Frobenius norm of the normalized theoretical asymmetry matrix (+1 above, -1 below the diagonal)."""
+    # n*(n-1) off-diagonal entries of magnitude 1
+    return float(np.sqrt(n * (n - 1)))
+
+def _scaled_asym_frob(mat: np.ndarray) -> float:
+    """Frobenius norm of (mat - mat.T) scaled by its max abs value."""
+    diff = np.subtract(mat, mat.T)
+    max_abs = np.max(np.abs(diff))
+    if max_abs == 0:
         return 0.0
-    s_above = np.sum(slopes[rrn1 > rrn])
-    val = s_above / s_total
-    return float(2 * abs(val - 0.5))
+    return float(np.linalg.norm(diff / max_abs, "fro"))
+
+def _uniform_bin_index(v: np.ndarray, t: np.ndarray, num_bins: int) -> np.ndarray:
+    """histogram2d bin of each in-range value on a uniform [LOWER_BOUND, UPPER_BOUND] grid, without sorting.
+
+    `t` is the value rescaled to [0, 1]; rounding is corrected against the exact linspace edges
+    (bins are half-open except the last, as in np.histogram2d)."""
+    edges = np.linspace(LOWER_BOUND, UPPER_BOUND, num_bins + 1)
+    idx = np.clip((t * num_bins).astype(np.intp), 0, num_bins - 1)
+    idx -= v < edges[idx]
+    idx += (v >= edges[idx + 1]) & (idx < num_bins - 1)
+    return idx
+
+def scaled_frobenius_norms(rr_intervals: np.ndarray, num_bins_list: list[int]) -> list[float]:
+    """HB AMI for every resolution in `num_bins_list`, sharing the rescaled pairs across resolutions."""
+    prev, curr = rr_intervals[:-1], rr_intervals[1:]
+    keep = (prev >= LOWER_BOUND) & (prev <= UPPER_BOUND) & (curr >= LOWER_BOUND) & (curr <= UPPER_BOUND)
+    prev, curr = prev[keep], curr[keep]
+    span = UPPER_BOUND - LOWER_BOUND
+    tp, tc = (prev - LOWER_BOUND) / span, (curr - LOWER_BOUND) / span
+    out = []
+    for num_bins in num_bins_list:
+        ix = _uniform_bin_index(prev, tp, num_bins)
+        iy = _uniform_bin_index(curr, tc, num_bins)
+        counts = np.bincount(ix * num_bins + iy, minlength=num_bins * num_bins).reshape(num_bins, num_bins)
+        frob = _scaled_asym_frob(counts)
+        out.append(float(frob / _theory_frob_max(num_bins)))
+    return out
+
+def scaled_frobenius_norm(rr_intervals: np.ndarray, num_bins: int) -> float:
+    return scaled_frobenius_norms(rr_intervals, [num_bins])[0]
+
+def _kde_density_fft(rr_intervals: np.ndarray, grid_size: int) -> np.ndarray:
+    """Binned approximation of the gaussian_kde grid: pairs linearly (cloud-in-cell) binned
+    onto the evaluation grid, convolved with the same Scott's-rule Gaussian kernel
+    (full covariance) via FFT.
+
+    Changes results. Nearest-bin assignment was tried first and was off by up to 14% on
+    48 random 1- and 5-minute recordings, because bin snapping swamps the small asymmetry
+    signal. With linear binning, the three worst of those files come out at 0.16%, 0.64%
+    and 1.5% relative error. That is the largest deviation measured so far, but this version
+    has not been re-measured across all recordings and timescales. Validate against 'exact'
+    before relying on it."""
+    pairs = np.vstack((rr_intervals[1:], rr_intervals[:-1]))  # (x, y) as in gaussian_kde
+    n = pairs.shape[1]
+    step = (UPPER_BOUND - LOWER_BOUND) / (grid_size - 1)
+
+    # Linear binning: each pair spreads its unit mass over the 4 surrounding grid nodes.
+    # Rows follow y (rr_n), columns follow x (rr_n+1), matching the meshgrid layout.
+    inside = np.all((pairs >= LOWER_BOUND) & (pairs <= UPPER_BOUND), axis=0)
+    u = (pairs[:, inside] - LOWER_BOUND) / step
+    i0 = np.minimum(np.floor(u).astype(np.intp), grid_size - 2)
+    w = u - i0
+    (ix, iy), (wx, wy) = i0, w
+    flat = iy * grid_size + ix
+    idx = np.concatenate((flat, flat + 1, flat + grid_size, flat + grid_size + 1))
+    weights = np.concatenate(((1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx))
+    counts = np.bincount(idx, weights=weights, minlength=grid_size * grid_size).reshape(grid_size, grid_size)
+
+    cov = np.cov(pairs) * n ** (-2.0 / 6.0)  # Scott's factor n**(-1/(d+4)), d=2
+    inv_cov = np.linalg.inv(cov)
+    half = np.minimum(np.ceil(4.0 * np.sqrt(np.diag(cov)) / step).astype(int), grid_size - 1)
+    ox = np.arange(-half[0], half[0] + 1) * step
+    oy = np.arange(-half[1], half[1] + 1) * step
+    OX, OY = np.meshgrid(ox, oy, indexing="xy")
+    kernel = np.exp(-0.5 * (inv_cov[0, 0] * OX**2 + 2 * inv_cov[0, 1] * OX * OY + inv_cov[1, 1] * OY**2))
+    kernel /= kernel.sum()
+
+    # float32 halves the traffic of the FFT and the reduction passes; this path is approximate anyway
+    density = fftconvolve(counts.astype(np.float32), kernel.astype(np.float32), mode="same")
+    return density / (n * step * step)
 
 def ami_kde(rr_intervals: np.ndarray, grid_size: int) -> float:
     if rr_intervals.size < 3:
         return 0.0
-    pairs = np.column_stack((rr_intervals[1:], rr_intervals[:-1]))
-    kde = gaussian_kde(pairs.T)
-    x = np.linspace(LOWER_BOUND, UPPER_BOUND, grid_size)
-    y = np.linspace(LOWER_BOUND, UPPER_BOUND, grid_size)
-    X, Y = np.meshgrid(x, y, indexing="xy")
-    coords = np.vstack([X.ravel(), Y.ravel()])
-    density = kde(coords).reshape(grid_size, grid_size)
-    diff = density - density.T
-    max_abs = np.max(np.abs(diff))
-    if max_abs == 0:
-        return 0.0
-    scaled_diff = diff / max_abs
-    theory = np.triu(np.ones((grid_size, grid_size)), 1) - np.tril(np.ones((grid_size, grid_size)), -1)
-    norm_theory = theory / np.max(np.abs(theory))
-    frob_max = np.linalg.norm(norm_theory, "fro")
-    frob = np.linalg.norm(scaled_diff, "fro")
-    return float(frob / frob_max)
+    if KDE_METHOD == "fft":
+        density = _kde_density_fft(rr_intervals, grid_size)
+    else:
+        pairs = np.column_stack((rr_intervals[1:], rr_intervals[:-1]))
+        kde = gaussian_kde(pairs.T)
+        x = np.linspace(LOWER_BOUND, UPPER_BOUND, grid_size)
+        y = np.linspace(LOWER_BOUND, UPPER_BOUND, grid_size)
+        X, Y = np.meshgrid(x, y, indexing="xy")
+        coords = np.vstack([X.ravel(), Y.ravel()])
+        density = kde(coords).reshape(grid_size, grid_size)
+    frob = _scaled_asym_frob(density)
+    return float(frob / _theory_frob_max(grid_size))
 
 # ╔════════════════════════════════════════════════════════════════════════════╗
 # ║                             Utility Function                               ║
@@ -223,8 +359,14 @@ def _list_mat_files(directory: Path) -> list[Path]:
     return sorted(p for p in directory.glob("*.mat"))
 
 def _load_rr(file_path: Path) -> np.ndarray:
-    """Load RR intervals from a .mat file assuming variable 'data'."""
-    mat = scipy.io.loadmat(file_path)
+    """Load RR intervals from a .mat file, reading only variable 'rr_intervals'."""
+    try:
+        mat = scipy.io.loadmat(file_path, variable_names=["rr_intervals"])
+    except NotImplementedError:
+        # MATLAB v7.3 files are HDF5 containers, which loadmat cannot read
+        import h5py
+        with h5py.File(file_path, "r") as f:
+            return np.asarray(f["rr_intervals"][()], dtype=float).squeeze()
     rr = np.asarray(mat["rr_intervals"]).squeeze()
     return rr
 
@@ -234,10 +376,9 @@ def _filter_rr(rr: np.ndarray) -> np.ndarray:
 
 def _write_csv(rows: np.ndarray, header: list[str], out_path: Path) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(header)
-        w.writerows(rows)
+    # %.17g round-trips float64 exactly, like the str() formatting of csv.writer
+    np.savetxt(out_path, np.asarray(rows, dtype=float), delimiter=",",
+               header=",".join(header), comments="", fmt="%.17g")
 
 def _load_ids(csv_path: Path) -> set[int]:
     """Load IDs from first column of a CSV (skips header if present)."""
@@ -275,6 +416,40 @@ def _iter_timescale_dirs(base: Path) -> list[Path]:
         return int(digits) if digits else 0
     return sorted(subs, key=lambda p: _extract_minutes(p.name))
 
+def _process_file(file_path: Path) -> tuple[np.ndarray, list[float]]:
+    """Return the bin-independent index row (HB AMI slot left at 0) and HB AMI per NUM_BINS_LIST entry."""
+    rr = _filter_rr(_load_rr(file_path))
+    if rr.size < 3:
+        return np.zeros(9, dtype=float), [0.0] * len(NUM_BINS_LIST)
+    sd1, sd2 = _sd1_sd2(rr)
+    gi, pi, asi, si, ai = _hra_all(rr[:-1], rr[1:])  # zero-copy (RR_n, RR_n+1) views
+    fixed = np.array([
+        sd1,
+        sd2,
+        gi,
+        pi,
+        asi,
+        0.0,  # HB AMI (per num_bins)
+        si,
+        ai,
+        ami_kde(rr, GRID_SIZE),
+    ], dtype=float)
+    hb_ami = scaled_frobenius_norms(rr, NUM_BINS_LIST)
+    return fixed, hb_ami
+
+def _map_files(files: list[Path], desc: str) -> list[tuple[np.ndarray, list[float]]]:
+    """Run `_process_file` over files, in worker processes unless N_JOBS == 1 (order preserved)."""
+    if N_JOBS == 1:
+        it = map(_process_file, files)
+        if USE_TQDM:
+            it = tqdm(it, total=len(files), desc=desc, unit="file")
+        return list(it)
+    with ProcessPoolExecutor(max_workers=N_JOBS) as executor:
+        it = executor.map(_process_file, files)
+        if USE_TQDM:
+            it = tqdm(it, total=len(files), desc=desc, unit="file")
+        return list(it)
+
 # Compute and export nonlinear measures for a specific group
 def _compute_and_export_for_group(
     group_prefix: str,
@@ -303,46 +478,15 @@ def _compute_and_export_for_group(
         if not eligible_files:
             continue
 
-        # Precompute KDE AMI per file (once)
-        ami_vals: list[float] = []
-        iterable = eligible_files
-        if USE_TQDM:
-            iterable = tqdm(eligible_files, desc=f"KDE AMI {group_prefix} {timescale}min", unit="file")
-        for f in iterable:
-            rr = _filter_rr(_load_rr(f))
-            ami_vals.append(ami_kde(rr, GRID_SIZE))
-
-        # Compute other indices for each histogram resolution
-        for num_bins in NUM_BINS_LIST:
-            rows = []
-            iterable2 = enumerate(eligible_files)
-            if USE_TQDM:
-                iterable2 = tqdm(
-                    enumerate(eligible_files),
-                    total=len(eligible_files),
-                    desc=f"Indices {group_prefix} {timescale}min_{num_bins}bins",
-                    unit="file",
-                )
-            for idx, f in iterable2:
-                rr = _filter_rr(_load_rr(f))
-                if rr.size < 3:
-                    rows.append([0.0] * 9)
-                    continue
-                M = np.column_stack((rr[:-1], rr[1:]))
-
-                rows.append([
-                    SD1(rr),
-                    SD2(rr),
-                    guzik_index(M),
-                    porta_index(M),
-                    asymmetric_spread_index(M),
-                    scaled_frobenius_norm(rr, num_bins),
-                    slope_index(M),
-                    area_index(M),
-                    ami_vals[idx],  # KDE AMI (precomputed)
-                ])
-
-            arr = np.asarray(rows, dtype=float)
+        # Per-file indices (files are independent, so they are processed in parallel)
+        results = _map_files(eligible_files, desc=f"Indices {group_prefix} {timescale}min")
+        fixed = np.vstack([r[0] for r in results])
+        hb_ami = np.asarray([r[1] for r in results], dtype=float)
+
+        # Only HB AMI depends on the histogram resolution
+        for b, num_bins in enumerate(NUM_BINS_LIST):
+            arr = fixed.copy()
+            arr[:, 5] = hb_ami[:, b]
 
             # Convert selected indices to percent: GI(2), PI(3), HB AMI(5), SI(6), AI(7), KDE AMI(8)
             for c in (2, 3, 5, 6, 7, 8):
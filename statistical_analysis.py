@@ -85,6 +85,7 @@ g2_ALT_FILENAME_TEMPLATE = "g2_{num_bins}bins.csv"
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend (no figure windows)
 
+import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 from helper_functions import (
@@ -123,6 +124,8 @@ def resolve_csv_path(base_dir: str,
 
 def main():
     """Main analysis loop: iterates over all timescale/bin combinations."""
+    # Figures are built on first use and redrawn for every later combination
+    fig_sd = fig_hra = None
     for minutes in TIMESCALES_MIN:
         for num_bins in NUM_BINS_LIST:
 
@@ -150,14 +153,14 @@ def main():
             eff_df = calculate_effect_sizes(group1_data, group2_data, index_names, g1_label=g1, g2_label=g2)
 
             # Store raw p-values
-            pvals_map = {row['Index']: row['raw_p_value'] for _, row in eff_df.iterrows()}
+            pvals_map = dict(zip(eff_df['Index'], eff_df['raw_p_value']))
 
             # Compute Relative Median Differences
-            rmd_vals = []
-            for idx in eff_df['Index']:
-                g1_med = group1_data[idx].median()
-                g2_med = group2_data[idx].median()
-                rmd_vals.append(np.nan if g1_med == 0 else round(abs((g2_med - g1_med) / g1_med) * 100, 1))
+            eff_indices = list(eff_df['Index'])
+            g1_med = group1_data[eff_indices].median().to_numpy()
+            g2_med = group2_data[eff_indices].median().to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rmd_vals = np.where(g1_med == 0, np.nan, np.abs((g2_med - g1_med) / g1_med) * 100).round(1)
 
             export_df = eff_df.copy()
             export_df.insert(0, "RMD [%]", rmd_vals)
@@ -179,18 +182,17 @@ def main():
 
             fig_sd = plot_boxplots_fixed_with_pvals(
                 group1_data, group2_data, group1_indexes, pvals_map,
-                g1_label=g1, g2_label=g2, fixed_ylim=FIXED_YLIM
+                g1_label=g1, g2_label=g2, fixed_ylim=FIXED_YLIM, fig=fig_sd
             )
             fig_hra = plot_boxplots_fixed_with_pvals(
                 group1_data, group2_data, group2_indexes, pvals_map,
-                g1_label=g1, g2_label=g2, fixed_ylim=FIXED_YLIM
+                g1_label=g1, g2_label=g2, fixed_ylim=FIXED_YLIM, fig=fig_hra
             )
 
             fig_sd.savefig(os.path.join(results_dir, "sd1_sd2.png"), dpi=300)
             fig_hra.savefig(os.path.join(results_dir, "hra_indices.png"), dpi=300)
 
-            import matplotlib.pyplot as plt
-            plt.close('all')
+    plt.close('all')
 
     print("\nAll combinations of timescales and num_bins have been processed.")
 
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Scripts live at the repository root; make them importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,57 @@
+"""The optional numba HRA kernel must agree with the NumPy definitions."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+import nonlinear_measures as nm
+
+# Welford spreads and loop-order sums differ from NumPy's pairwise reductions only in
+# the last bits; on real recordings up to ~2.3e-10 relative (Slope/Area Index).
+DEGENERATE_RTOL = 1e-12
+REAL_DATA_RTOL = 1e-9
+
+DEGENERATE_CASES = {
+    "one up pair": [800.0, 900.0, 900.0, 900.0],
+    "one down pair": [900.0, 800.0, 800.0, 800.0],
+    "all equal": [800.0] * 5,
+    "monotone increasing": [700.0, 750.0, 800.0, 850.0, 900.0],
+    "monotone decreasing": [900.0, 850.0, 800.0, 750.0, 700.0],
+}
+
+HRV_DIR = Path(nm.ROOT_DIR) / "input_data" / "HRV"
+REAL_FILES = sorted(
+    f
+    for timescale_dir in sorted(HRV_DIR.glob("*/*min"))
+    for f in nm._list_mat_files(timescale_dir)[:3]
+)
+
+
+def _both_kernels(rr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    nb = np.asarray(nm._hra_all_nb(rr[:-1], rr[1:]), dtype=float)
+    ref = np.asarray(nm._hra_all_np(rr[:-1], rr[1:]), dtype=float)
+    return nb, ref
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")  # ddof=1 spread of a single value
+@pytest.mark.parametrize("values", DEGENERATE_CASES.values(), ids=DEGENERATE_CASES.keys())
+def test_degenerate_series_match(values):
+    nb, ref = _both_kernels(np.asarray(values, dtype=float))
+    np.testing.assert_allclose(nb, ref, rtol=DEGENERATE_RTOL, atol=0.0, equal_nan=True)
+
+
+def test_one_up_pair_gives_nan_asi():
+    nb, _ = _both_kernels(np.asarray(DEGENERATE_CASES["one up pair"]))
+    assert np.isnan(nb[2])
+
+
+@pytest.mark.parametrize("file_path", REAL_FILES, ids=lambda p: "/".join(p.parts[-3:]))
+def test_real_recordings_match(file_path):
+    rr = nm._filter_rr(nm._load_rr(file_path))
+    if rr.size < 3:
+        pytest.skip("too few RR intervals in range")
+    nb, ref = _both_kernels(rr)
+    np.testing.assert_allclose(nb, ref, rtol=REAL_DATA_RTOL, atol=0.0, equal_nan=True)